@@ -1,5 +1,14 @@
 # install opencv "pip install opencv-python"
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
+import numpy as np
+
+from video_source import (
+    LatencyMeter, add_source_arguments, open_video_source,
+    source_options_from_args)
 
 # distance from camera to object(face) measured
 # centimeter
@@ -19,7 +28,23 @@ BLACK = (0, 0, 0)
 fonts = cv2.FONT_HERSHEY_COMPLEX
 
 # face detector object
-face_detector = cv2.CascadeClassifier("haarcascade_frontalface_default.xml")
+CASCADE_PATH = "haarcascade_frontalface_default.xml"
+face_detector = cv2.CascadeClassifier(CASCADE_PATH)
+
+# tiled detection settings, used by face_data(image, tiled=True)
+# number of tiles (columns, rows)
+TILE_GRID = (2, 2)
+# overlap between neighbouring tiles, as a fraction of the tile size.
+# faces up to the overlap size always fit whole in one tile, larger
+# faces are searched on the full frame
+TILE_OVERLAP = 0.25
+
+# worker threads for tiled detection, one pool per worker count
+_tile_pools = {}
+
+# a CascadeClassifier is not safe to share between threads,
+# so every worker loads its own copy
+_thread_local = threading.local()
 
 # focal length finder function
 def Focal_Length_Finder(measured_distance, real_width, width_in_rf_image):
@@ -29,101 +54,216 @@ def Focal_Length_Finder(measured_distance, real_width, width_in_rf_image):
     return focal_length
 
 # distance estimation function
+# face_width_in_frame can be a single width or an array of widths,
+# in which case all the distances are computed in one operation
 def Distance_finder(Focal_Length, real_face_width, face_width_in_frame):
 
-    distance = (real_face_width * Focal_Length)/face_width_in_frame
+    face_width_in_frame = np.asarray(face_width_in_frame, dtype=np.float64)
+
+    # zero width means no face, keep the distance at zero for it
+    distance = np.divide(
+        real_face_width * Focal_Length, face_width_in_frame,
+        out=np.zeros_like(face_width_in_frame),
+        where=face_width_in_frame != 0)
 
     # return the distance
     return distance
 
 
-def face_data(image):
+def _thread_face_detector():
 
-    face_width = 0  # making face width to zero
+    # load the cascade once per worker thread
+    detector = getattr(_thread_local, "detector", None)
+    if detector is None:
+        detector = cv2.CascadeClassifier(CASCADE_PATH)
+        _thread_local.detector = detector
+    return detector
 
-    # converting color image to gray scale image
-    gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
-    # detecting face in the image
-    faces = face_detector.detectMultiScale(gray_image, 1.3, 5)
+def _detect_region(gray_image, x0, y0, x1, y1, min_size=(0, 0), max_size=(0, 0)):
 
-    # looping through the faces detect in the image
-    # getting coordinates x, y , width and height
-    for (x, y, h, w) in faces:
+    # detecting faces in one region of the image
+    region = gray_image[y0:y1, x0:x1]
+    faces = _thread_face_detector().detectMultiScale(
+        region, scaleFactor=1.3, minNeighbors=5,
+        minSize=min_size, maxSize=max_size)
 
-        # draw the rectangle on the face
-        cv2.rectangle(image, (x, y), (x+w, y+h), GREEN, 2)
+    if len(faces) == 0:
+        return np.empty((0, 4), dtype=np.int32)
+
+    # moving the boxes back to full image coordinates
+    faces = np.asarray(faces, dtype=np.int32)
+    faces[:, 0] += x0
+    faces[:, 1] += y0
+    return faces
+
+
+def detect_faces_tiled(gray_image, grid=TILE_GRID, overlap=TILE_OVERLAP):
 
-        # getting face width in the pixels
-        face_width = w
+    height, width = gray_image.shape[:2]
+    cols, rows = grid
 
-    # return the face width in pixel
-    return face_width
+    if cols * rows <= 1:
+        return _detect_region(gray_image, 0, 0, width, height)
 
+    # size of one tile, including the overlap with its neighbours
+    tile_w = min(int(width / cols * (1 + overlap)), width)
+    tile_h = min(int(height / rows * (1 + overlap)), height)
+    step_x = (width - tile_w) / max(cols - 1, 1)
+    step_y = (height - tile_h) / max(rows - 1, 1)
 
-# reading reference_image from directory
-ref_image = cv2.imread("captured_images/capture_20250620_155553_000.jpg")
+    # any face up to the overlap size lies whole inside one tile
+    overlap_x = tile_w - step_x if cols > 1 else width
+    overlap_y = tile_h - step_y if rows > 1 else height
+    split_size = int(min(overlap_x, overlap_y))
 
-# find the face width(pixels) in the reference_image
-ref_image_face_width = face_data(ref_image)
+    jobs = []
+    for row in range(rows):
+        for col in range(cols):
+            x0 = int(round(col * step_x))
+            y0 = int(round(row * step_y))
+            jobs.append((x0, y0, min(x0 + tile_w, width), min(y0 + tile_h, height),
+                         (0, 0), (split_size, split_size)))
 
-# get the focal by calling "Focal_Length_Finder"
-# face width in reference(pixels),
-# Known_distance(centimeters),
-# known_width(centimeters)
-Focal_length_found = Focal_Length_Finder(
-    Known_distance, Known_width, ref_image_face_width)
+    # faces bigger than the overlap can cross every tile border,
+    # they are searched on the full frame (only the large scales)
+    jobs.append((0, 0, width, height, (split_size + 1, split_size + 1), (0, 0)))
 
-print(Focal_length_found)
+    workers = len(jobs)
+    pool = _tile_pools.get(workers)
+    if pool is None:
+        pool = _tile_pools[workers] = ThreadPoolExecutor(max_workers=workers)
 
-# show the reference image
-cv2.imshow("ref_image", ref_image)
+    # detectMultiScale releases the GIL, so the jobs run in parallel
+    results = list(pool.map(lambda job: _detect_region(gray_image, *job), jobs))
+    faces = np.concatenate(results)
 
-# initialize the camera object so that we
-# can get frame from it
-cap = cv2.VideoCapture(1)
+    if len(faces) == 0:
+        return faces
 
-# looping through frame, incoming from 
-# camera/video
-while True:
+    # a face inside an overlap is found by several tiles, merge them.
+    # every box is listed twice so that faces found by a single tile
+    # pass the groupThreshold of 1
+    rects = faces.tolist()
+    merged, _ = cv2.groupRectangles(rects + rects, 1, 0.2)
+    return np.asarray(merged, dtype=np.int32).reshape(-1, 4)
 
-    # reading the frame from camera
-    _, frame = cap.read()
 
-    # calling face_data function to find
-    # the width of face(pixels) in the frame
-    face_width_in_frame = face_data(frame)
+def face_data(image, tiled=False):
 
-    # check if the face is zero then not 
-    # find the distance
-    if face_width_in_frame != 0:
-      
-        # finding the distance by calling function 
-        # Distance finder function need 
-        # these arguments the Focal_Length,
+    # converting color image to gray scale image
+    gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    # detecting face in the image
+    if tiled:
+        faces = detect_faces_tiled(gray_image)
+    else:
+        faces = face_detector.detectMultiScale(gray_image, 1.3, 5)
+        faces = np.asarray(faces, dtype=np.int32).reshape(-1, 4)
+
+    # looping through the faces detect in the image
+    # getting coordinates x, y , width and height
+    for (x, y, w, h) in faces:
+
+        # draw the rectangle on the face
+        cv2.rectangle(image, (x, y), (x+w, y+h), GREEN, 2)
+
+    # return all the faces as an array of rows (x, y, width, height)
+    return faces
+
+
+def main():
+
+    # video source options (camera 1 by default)
+    parser = argparse.ArgumentParser(description="Haar face distance estimation")
+    add_source_arguments(parser)
+    parser.add_argument(
+        "--tiled", action="store_true",
+        help="split the frames into overlapping tiles detected in a thread "
+             "pool; slower than the default full-frame detection, it can "
+             "find more faces in crowded frames")
+    args = parser.parse_args()
+    source_options = source_options_from_args(args)
+    source_options.setdefault("source", 1)
+
+    # reading reference_image from directory
+    ref_image = cv2.imread("captured_images/capture_20250620_155553_000.jpg")
+
+    # find the face width(pixels) in the reference_image,
+    # the widest face is the person measured at Known_distance
+    ref_faces = face_data(ref_image)
+    if len(ref_faces) == 0:
+        raise SystemExit("No face found in the reference image")
+    ref_image_face_width = ref_faces[:, 2].max()
+
+    # get the focal by calling "Focal_Length_Finder"
+    # face width in reference(pixels),
+    # Known_distance(centimeters),
+    # known_width(centimeters)
+    Focal_length_found = Focal_Length_Finder(
+        Known_distance, Known_width, ref_image_face_width)
+
+    print(Focal_length_found)
+
+    # show the reference image
+    cv2.imshow("ref_image", ref_image)
+
+    # initialize the video source so that we
+    # can get frame from it
+    cap = open_video_source(**source_options)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open video source {cap.description}")
+
+    # capture-to-display latency
+    latency = LatencyMeter()
+
+    # looping through frame, incoming from
+    # camera/video
+    while True:
+
+        # reading the frame from camera
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        # calling face_data function to find
+        # all the faces(pixels) in the frame
+        faces = face_data(frame, tiled=args.tiled)
+
+        # finding the distance of every face at once by calling
+        # Distance finder function with these arguments the Focal_Length,
         # Known_width(centimeters),
-        # and Known_distance(centimeters)
-        Distance = Distance_finder(
-            Focal_length_found, Known_width, face_width_in_frame)
+        # and the face widths(pixels)
+        Distances = Distance_finder(
+            Focal_length_found, Known_width, faces[:, 2])
+
+        for (x, y, w, h), Distance in zip(faces, Distances):
+
+            # draw line as background of text
+            cv2.line(frame, (x, y - 20), (x + 200, y - 20), RED, 32)
+            cv2.line(frame, (x, y - 20), (x + 200, y - 20), BLACK, 28)
+
+            # Drawing Text on the screen
+            cv2.putText(
+                frame, f"Distance: {round(Distance,2)} CM", (x, y - 15),
+              fonts, 0.6, GREEN, 2)
+
+        # show the frame on the screen
+        cv2.imshow("frame", frame)
+        latency.update(cap)
 
-        # draw line as background of text
-        cv2.line(frame, (30, 30), (230, 30), RED, 32)
-        cv2.line(frame, (30, 30), (230, 30), BLACK, 28)
+        # quit the program if you press 'q' on keyboard
+        if cv2.waitKey(1) == ord("q"):
+            break
 
-        # Drawing Text on the screen
-        cv2.putText(
-            frame, f"Distance: {round(Distance,2)} CM", (30, 35), 
-          fonts, 0.6, GREEN, 2)
+    # closing the camera
+    cap.release()
 
-    # show the frame on the screen
-    cv2.imshow("frame", frame)
+    # closing the windows that are opened
+    cv2.destroyAllWindows()
 
-    # quit the program if you press 'q' on keyboard
-    if cv2.waitKey(1) == ord("q"):
-        break
+    print(latency.report(cap.description))
 
-# closing the camera
-cap.release()
 
-# closing the windows that are opened
-cv2.destroyAllWindows()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,15 @@
+import argparse
 import cv2
 import os
 from datetime import datetime
 
-def capture_image():
+from video_source import LatencyMeter, add_source_arguments, open_video_source, source_options_from_args
+
+def capture_image(source=0, width=640, height=480, **source_options):
     """Capture une image depuis la webcam et la sauvegarde"""
     
-    # Initialiser la webcam (0 = caméra par défaut)
-    cap = cv2.VideoCapture(0)
+    # Initialiser la webcam (0 = caméra par défaut) et la résolution
+    cap = open_video_source(source, width=width, height=height, **source_options)
     
     # Vérifier si la caméra s'ouvre correctement
     if not cap.isOpened():
@@ -14,11 +17,7 @@ def capture_image():
         print("Vérifiez que votre caméra est connectée et non utilisée par une autre application")
         return False
     
-    # Optionnel: Définir la résolution
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    
-    print("Webcam initialisée avec succès")
+    print(f"Webcam initialisée avec succès: {cap.description}")
     print("Appuyez sur 'ESPACE' pour capturer une image")
     print("Appuyez sur 'q' pour quitter")
     
@@ -29,6 +28,7 @@ def capture_image():
         print(f"Dossier '{save_folder}' créé")
     
     image_count = 0
+    latency = LatencyMeter()
     
     while True:
         # Lire une frame depuis la webcam
@@ -40,6 +40,7 @@ def capture_image():
         
         # Afficher la frame en temps réel
         cv2.imshow('Webcam - Appuyez sur ESPACE pour capturer', frame)
+        latency.update(cap)
         
         # Attendre une touche
         key = cv2.waitKey(1) & 0xFF
@@ -75,12 +76,13 @@ def capture_image():
     cv2.destroyAllWindows()
     
     print(f"Session terminée. {image_count} image(s) capturée(s)")
+    print(latency.report(cap.description))
     return True
 
-def capture_single_image():
+def capture_single_image(source=0, **source_options):
     """Version simplifiée pour capturer une seule image rapidement"""
     
-    cap = cv2.VideoCapture(0)
+    cap = open_video_source(source, **source_options)
     
     if not cap.isOpened():
         print("Erreur: Impossible d'ouvrir la webcam")
@@ -119,20 +121,16 @@ def capture_single_image():
     cap.release()
     return True
 
-def capture_with_preview():
+def capture_with_preview(source=1, width=1280, height=720, fps=30, **source_options):
     """Version avec prévisualisation et meilleure interface"""
     
-    cap = cv2.VideoCapture(1)
+    # Améliorer la qualité d'image
+    cap = open_video_source(source, width=width, height=height, fps=fps, **source_options)
     
     if not cap.isOpened():
         print("Erreur: Impossible d'ouvrir la webcam")
         return False
     
-    # Améliorer la qualité d'image
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-    cap.set(cv2.CAP_PROP_FPS, 30)
-    
     # Créer le dossier de sauvegarde
     save_folder = "captured_images"
     if not os.path.exists(save_folder):
@@ -149,6 +147,7 @@ def capture_with_preview():
     
     image_count = 0
     fullscreen = False
+    latency = LatencyMeter()
     
     while True:
         ret, frame = cap.read()
@@ -169,6 +168,7 @@ def capture_with_preview():
         # Afficher la frame
         window_name = 'Webcam Capture'
         cv2.imshow(window_name, frame)
+        latency.update(cap)
         
         # Gestion des touches
         key = cv2.waitKey(1) & 0xFF
@@ -226,8 +226,13 @@ def capture_with_preview():
     cap.release()
     cv2.destroyAllWindows()
     print(f"\nSession terminée. Total: {image_count} image(s) capturée(s)")
+    print(latency.report(cap.description))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Capture d'images webcam")
+    add_source_arguments(parser)
+    source_options = source_options_from_args(parser.parse_args())
+    
     print("Choisissez le mode de capture:")
     print("1. Mode interactif avec prévisualisation (recommandé)")
     print("2. Mode simple (ESPACE pour capturer)")
@@ -237,14 +242,14 @@ if __name__ == "__main__":
         choice = input("Votre choix (1-3): ").strip()
         
         if choice == "1":
-            capture_with_preview()
+            capture_with_preview(**source_options)
         elif choice == "2":
-            capture_image()
+            capture_image(**source_options)
         elif choice == "3":
-            capture_single_image()
+            capture_single_image(**source_options)
         else:
             print("Choix invalide, utilisation du mode par défaut...")
-            capture_with_preview()
+            capture_with_preview(**source_options)
             
     except KeyboardInterrupt:
         print("\nArrêt demandé par l'utilisateur")
@@ -0,0 +1,390 @@
+# Installation: pip install opencv-python numpy (ultralytics pour --pipeline yolo)
+"""
+Générateur de scènes synthétiques pour les tests de montée en charge.
+
+Des découpes de personnes prises à la distance de référence (Known_distance)
+sont collées sur un fond à une échelle connue : une découpe réduite d'un
+facteur s apparaît à Known_distance / s, ce qui donne la distance réelle de
+chaque personne. Les images sont servies comme une source vidéo et passées
+à face_data (Haar) ou get_person_data_yolo, en mesurant le débit, la latence
+et l'erreur de distance quand le nombre de personnes passe de 1 à 50.
+"""
+import argparse
+import importlib.util
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+
+from video_source import IMAGE_EXTENSIONS, LatencyMeter, VideoSource
+
+REFERENCE_IMAGE = "captured_images/capture_20250620_155553_000.jpg"
+
+DEFAULT_COUNTS = (1, 2, 5, 10, 20, 30, 40, 50)
+
+
+def load_script(path, name):
+    """Importe un script du dépôt dont le nom contient des tirets"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_images(folder):
+    """Charge toutes les images d'un dossier"""
+    images = []
+    for name in sorted(os.listdir(folder)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            image = cv2.imread(os.path.join(folder, name))
+            if image is not None:
+                images.append(image)
+    return images
+
+
+def person_crop_from_reference(reference, faces):
+    """
+    Découpe la tête et les épaules de la personne la plus proche de l'image
+    de référence, à partir des visages (x, y, w, h) trouvés par face_data.
+    """
+    height, width = reference.shape[:2]
+    x, y, w, h = faces[np.argmax(faces[:, 2])]
+
+    # Une largeur de visage de chaque côté, une demi au-dessus, deux en dessous
+    x1, y1 = max(x - w, 0), max(y - h // 2, 0)
+    x2, y2 = min(x + 2 * w, width), min(y + 3 * h, height)
+    return reference[y1:y2, x1:x2].copy()
+
+
+def make_background(width, height, rng):
+    """Fond texturé aléatoire (dégradés + bruit flouté)"""
+    horizontal = np.tile(np.linspace(40, 200, width, dtype=np.float32), (height, 1))
+    vertical = np.tile(np.linspace(200, 40, height, dtype=np.float32)[:, np.newaxis], (1, width))
+    background = np.stack([horizontal, vertical, (horizontal + vertical) / 2], axis=-1)
+    noise = rng.normal(0, 25, (height, width, 3)).astype(np.float32)
+    background = cv2.GaussianBlur(background + noise, (0, 0), 3)
+    return np.clip(background, 0, 255).astype(np.uint8)
+
+
+def calibration_frame(crop, frame_size, backgrounds=None, seed=0):
+    """
+    Colle la découpe à l'échelle 1 (donc à Known_distance) au centre d'un fond.
+    Renvoie l'image et la boîte (x, y, w, h) de la découpe.
+    """
+    crop_h, crop_w = crop.shape[:2]
+    width, height = max(frame_size[0], crop_w), max(frame_size[1], crop_h)
+
+    if backgrounds:
+        frame = cv2.resize(backgrounds[0], (width, height), interpolation=cv2.INTER_AREA)
+    else:
+        frame = make_background(width, height, np.random.default_rng(seed))
+
+    x, y = (width - crop_w) // 2, (height - crop_h) // 2
+    frame[y:y + crop_h, x:x + crop_w] = crop
+    return frame, (x, y, crop_w, crop_h)
+
+
+class SyntheticSceneCapture:
+    """
+    Source vidéo (interface cv2.VideoCapture) qui compose count personnes par
+    image. Après chaque read(), truth contient la liste des personnes placées :
+    {'bbox': (x, y, w, h), 'distance': cm}.
+    """
+
+    def __init__(self, crops, count, reference_distance, frame_size=(1280, 720),
+                 backgrounds=None, frames=100, seed=0):
+        self.crops = crops
+        self.count = count
+        self.reference_distance = reference_distance
+        self.frame_size = frame_size
+        self.backgrounds = backgrounds or []
+        self.frames = frames
+        self.rng = np.random.default_rng(seed)
+        self.index = 0
+        self.truth = []
+
+        if not self.backgrounds:
+            self.backgrounds = [make_background(frame_size[0], frame_size[1], self.rng)]
+
+    def _background(self):
+        width, height = self.frame_size
+        background = self.backgrounds[self.index % len(self.backgrounds)]
+        if background.shape[1] != width or background.shape[0] != height:
+            background = cv2.resize(background, (width, height), interpolation=cv2.INTER_AREA)
+        return background.copy()
+
+    def read(self):
+        if self.index >= self.frames:
+            return False, None
+
+        frame = self._background()
+        width, height = self.frame_size
+
+        # Une personne par case d'une grille : pas de recouvrement
+        cols = math.ceil(math.sqrt(self.count * width / height))
+        rows = math.ceil(self.count / cols)
+        cell_w, cell_h = width // cols, height // rows
+        cells = self.rng.permutation(cols * rows)[:self.count]
+
+        self.truth = []
+        for cell in cells:
+            crop = self.crops[self.rng.integers(len(self.crops))]
+            crop_h, crop_w = crop.shape[:2]
+
+            # Échelle tirée entre 50% et 100% de la taille maximale de la case
+            max_scale = min(cell_w / crop_w, cell_h / crop_h, 1.5)
+            scale = self.rng.uniform(0.5, 1.0) * max_scale
+            new_w, new_h = int(crop_w * scale), int(crop_h * scale)
+            if new_w < 2 or new_h < 2:
+                continue
+
+            # Distance réelle correspondant à la taille effective en pixels
+            real_scale = new_w / crop_w
+            distance = self.reference_distance / real_scale
+
+            cell_x, cell_y = (cell % cols) * cell_w, (cell // cols) * cell_h
+            x = cell_x + int(self.rng.integers(cell_w - new_w + 1))
+            y = cell_y + int(self.rng.integers(cell_h - new_h + 1))
+
+            interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+            frame[y:y + new_h, x:x + new_w] = cv2.resize(crop, (new_w, new_h), interpolation=interpolation)
+            self.truth.append({'bbox': (x, y, new_w, new_h), 'distance': distance})
+
+        self.index += 1
+        return True, frame
+
+    def isOpened(self):
+        return len(self.crops) > 0
+
+    def getBackendName(self):
+        return "SYNTHETIC"
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.frame_size[0])
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.frame_size[1])
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frames)
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.index)
+        return 0.0
+
+    def set(self, prop_id, value):
+        return False
+
+    def release(self):
+        self.index = self.frames
+
+
+def open_synthetic_source(crops, count, reference_distance, **options):
+    """Ouvre une scène synthétique comme les autres sources de video_source.py"""
+    capture = SyntheticSceneCapture(crops, count, reference_distance, **options)
+    return VideoSource(capture, f"synthetique:{count} personnes")
+
+
+class HaarPipeline:
+    """face_data + Distance_finder de face-distance-estimation.py"""
+
+    def __init__(self, module, reference, tiled=False):
+        self.module = module
+        self.tiled = tiled
+        self.name = "haar+tuiles" if tiled else "haar"
+
+        # Même mode de détection pour la calibration et pour les mesures
+        ref_faces = module.face_data(reference.copy(), tiled=tiled)
+        if len(ref_faces) == 0:
+            raise SystemExit("Aucun visage détecté dans l'image de référence")
+        self.ref_faces = ref_faces
+        self.focal = module.Focal_Length_Finder(
+            module.Known_distance, module.Known_width, ref_faces[:, 2].max())
+
+    def __call__(self, frame):
+        faces = self.module.face_data(frame, tiled=self.tiled)
+        distances = self.module.Distance_finder(self.focal, self.module.Known_width, faces[:, 2])
+        centers = faces[:, :2] + faces[:, 2:] / 2
+        return centers, distances
+
+
+class YoloPipeline:
+    """get_person_data_yolo + Distance_finder de yolo-distance-estimation.py"""
+
+    name = "yolo"
+
+    def __init__(self, module, calibration_image, crop_bbox):
+        """
+        Calibre sur la découpe collée à l'échelle 1 (calibration_frame), pour que
+        la calibration et la vérité terrain portent sur le même objet.
+        """
+        self.module = module
+
+        # Une distance focale par type de détection : la largeur de visage
+        # estimée depuis la boîte 'person' n'est pas celle d'une boîte 'face'
+        x, y, w, h = crop_bbox
+        widths = {}
+        for detection in module.get_person_data_yolo(calibration_image.copy()):
+            cx, cy = _center(detection['bbox'])
+            if x <= cx < x + w and y <= cy < y + h:
+                kind = detection['type']
+                widths[kind] = max(widths.get(kind, 0), detection['face_width'])
+
+        if not widths:
+            raise SystemExit("Aucune personne détectée sur la découpe de calibration")
+        self.focal = {kind: module.Focal_Length_Finder(module.Known_distance, module.Known_width, width)
+                      for kind, width in widths.items()}
+
+    def __call__(self, frame):
+        # Les détections d'un type absent de la calibration ne sont pas mesurées
+        detections = [d for d in self.module.get_person_data_yolo(frame) if d['type'] in self.focal]
+        centers = np.array([_center(d['bbox']) for d in detections], dtype=np.float64).reshape(-1, 2)
+        distances = np.array([self.module.Distance_finder(self.focal[d['type']], self.module.Known_width,
+                                                          d['face_width'])
+                              for d in detections], dtype=np.float64)
+        return centers, distances
+
+
+def _center(bbox):
+    """Centre d'une boîte (x1, y1, x2, y2)"""
+    return (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+
+
+def match_detections(truth, centers, distances):
+    """
+    Associe chaque détection à la personne dont la boîte contient son centre.
+    Renvoie le nombre de personnes trouvées, le nombre de détections hors de
+    toute personne (faux positifs) et les erreurs absolues (cm) et relatives
+    des détections associées.
+    """
+    found = 0
+    matched = np.zeros(len(centers), dtype=bool)
+    abs_errors = []
+    rel_errors = []
+    for person in truth:
+        x, y, w, h = person['bbox']
+        inside = ((centers[:, 0] >= x) & (centers[:, 0] < x + w) &
+                  (centers[:, 1] >= y) & (centers[:, 1] < y + h))
+        if inside.any():
+            found += 1
+            matched |= inside
+            errors = np.abs(distances[inside] - person['distance'])
+            abs_errors.extend(errors.tolist())
+            rel_errors.extend((errors / person['distance']).tolist())
+    unmatched = int(len(centers) - matched.sum())
+    return found, unmatched, abs_errors, rel_errors
+
+
+def run_load_test(pipeline, crops, reference_distance, counts=DEFAULT_COUNTS, frames=30,
+                  frame_size=(1280, 720), backgrounds=None, seed=0, show=False):
+    """Mesure débit, latence et erreur de distance pour chaque nombre de personnes"""
+    results = []
+    for count in counts:
+        cap = open_synthetic_source(crops, count, reference_distance, frame_size=frame_size,
+                                    backgrounds=backgrounds, frames=frames, seed=seed)
+        latency = LatencyMeter(window=frames)
+        processing_time = 0.0
+        placed = found = detected = unmatched = processed = 0
+        abs_errors = []
+        rel_errors = []
+
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            centers, distances = pipeline(frame)
+            latency.update(cap)
+            processing_time += time.perf_counter() - cap.timestamp
+
+            truth = cap.cap.truth
+            frame_found, frame_unmatched, frame_abs, frame_rel = match_detections(truth, centers, distances)
+            placed += len(truth)
+            found += frame_found
+            detected += len(centers)
+            unmatched += frame_unmatched
+            processed += 1
+            abs_errors.extend(frame_abs)
+            rel_errors.extend(frame_rel)
+
+            if show:
+                cv2.imshow(f"Scene synthetique ({pipeline.name})", frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    show = False
+                    cv2.destroyAllWindows()
+
+        cap.release()
+        stats = latency.stats() or {'mean': 0.0, 'p95': 0.0}
+        result = {
+            'pipeline': pipeline.name,
+            'people': count,
+            'fps': frames / processing_time if processing_time else 0.0,
+            'latency_mean': stats['mean'],
+            'latency_p95': stats['p95'],
+            'recall': found / placed if placed else 0.0,
+            # Part des détections qui tombent sur une personne
+            'precision': (detected - unmatched) / detected if detected else float('nan'),
+            'false_positives': unmatched / processed if processed else 0.0,
+            'error_cm': float(np.mean(abs_errors)) if abs_errors else float('nan'),
+            'error_pct': 100 * float(np.mean(rel_errors)) if rel_errors else float('nan'),
+        }
+        results.append(result)
+        print(f"{result['pipeline']:>11} {result['people']:>8} {result['fps']:>8.1f} "
+              f"{result['latency_mean']:>10.1f} {result['latency_p95']:>9.1f} "
+              f"{100 * result['recall']:>8.1f} {100 * result['precision']:>11.1f} "
+              f"{result['false_positives']:>8.2f} {result['error_cm']:>10.1f} {result['error_pct']:>9.1f}")
+
+    if show:
+        cv2.destroyAllWindows()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de montée en charge sur scènes synthétiques")
+    parser.add_argument("--pipeline", choices=["haar", "yolo", "both"], default="haar")
+    parser.add_argument("--counts", default=",".join(str(c) for c in DEFAULT_COUNTS),
+                        help="Nombres de personnes à tester, séparés par des virgules")
+    parser.add_argument("--frames", type=int, default=30, help="Images générées par nombre de personnes")
+    parser.add_argument("--size", default="1280x720", help="Taille des images générées (LxH)")
+    parser.add_argument("--reference", default=REFERENCE_IMAGE, help="Image de référence à Known_distance")
+    parser.add_argument("--crops", help="Dossier de découpes de personnes prises à Known_distance")
+    parser.add_argument("--backgrounds", help="Dossier d'images de fond")
+    parser.add_argument("--tiled", action="store_true", help="Détection Haar par tuiles (calibration comprise)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--show", action="store_true", help="Afficher les images annotées")
+    args = parser.parse_args()
+
+    counts = [int(c) for c in args.counts.split(",")]
+    frame_size = tuple(int(v) for v in args.size.lower().split("x"))
+
+    reference = cv2.imread(args.reference)
+    if reference is None:
+        print(f"Erreur: Impossible de charger l'image de référence {args.reference}")
+        return
+
+    face_module = load_script("face-distance-estimation.py", "face_distance_estimation")
+    haar = HaarPipeline(face_module, reference, tiled=args.tiled)
+
+    if args.crops:
+        crops = load_images(args.crops)
+    else:
+        crops = [person_crop_from_reference(reference, haar.ref_faces)]
+    backgrounds = load_images(args.backgrounds) if args.backgrounds else None
+
+    pipelines = []
+    if args.pipeline in ("haar", "both"):
+        pipelines.append(haar)
+    if args.pipeline in ("yolo", "both"):
+        yolo_module = load_script("yolo-distance-estimation.py", "yolo_distance_estimation")
+        calibration_image, crop_bbox = calibration_frame(crops[0], frame_size, backgrounds, args.seed)
+        pipelines.append(YoloPipeline(yolo_module, calibration_image, crop_bbox))
+
+    print(f"{'pipeline':>11} {'personnes':>8} {'FPS':>8} {'lat. (ms)':>10} {'p95 (ms)':>9} "
+          f"{'rappel %':>8} {'précision %':>11} {'FP/image':>8} {'err. (cm)':>10} {'err. %':>9}")
+    for pipeline in pipelines:
+        run_load_test(pipeline, crops, face_module.Known_distance, counts=counts, frames=args.frames,
+                      frame_size=frame_size, backgrounds=backgrounds, seed=args.seed, show=args.show)
+
+
+if __name__ == "__main__":
+    main()
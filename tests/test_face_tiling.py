@@ -0,0 +1,64 @@
+import importlib.util
+import os
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REFERENCE_IMAGE = "captured_images/capture_20250620_155553_000.jpg"
+
+
+@pytest.fixture
+def face_module(monkeypatch):
+    # the script loads the cascade and the reference image by relative path
+    monkeypatch.chdir(REPO_ROOT)
+    spec = importlib.util.spec_from_file_location(
+        "face_distance_estimation", "face-distance-estimation.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def paste_face(frame, face_crop, face_width, center):
+    # the crop has half a face width of margin on each side
+    scale = face_width / (face_crop.shape[1] / 2)
+    crop = cv2.resize(face_crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    h, w = crop.shape[:2]
+    x, y = center[0] - w // 2, center[1] - h // 2
+    frame[y:y + h, x:x + w] = crop
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    return inter / (aw * ah + bw * bh - inter)
+
+
+def test_tiled_and_untiled_agree_on_tile_seams(face_module):
+    reference = cv2.imread(REFERENCE_IMAGE)
+    ref_faces = face_module.face_data(reference.copy())
+    assert len(ref_faces) > 0
+
+    x, y, w, h = ref_faces[np.argmax(ref_faces[:, 2])]
+    face_crop = reference[max(y - h // 2, 0):y + h + h // 2, max(x - w // 2, 0):x + w + w // 2]
+
+    # with the default 2x2 grid at 1280x720 the rows overlap on y 270-450
+    # and the columns on x 480-800: a 260 px face in the middle crosses
+    # both seams and is bigger than the overlap, a 120 px face on the left
+    # crosses the horizontal seam
+    frame = np.full((720, 1280, 3), 128, dtype=np.uint8)
+    paste_face(frame, face_crop, 260, (640, 360))
+    paste_face(frame, face_crop, 120, (250, 360))
+
+    untiled = face_module.face_data(frame.copy(), tiled=False)
+    tiled = face_module.face_data(frame.copy(), tiled=True)
+
+    assert len(untiled) > 0
+    assert len(tiled) == len(untiled)
+    for face in untiled:
+        assert max(iou(face, other) for other in tiled) > 0.5
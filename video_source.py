@@ -0,0 +1,450 @@
+# Installation: pip install opencv-python
+"""
+Sources vidéo partagées par image_cap.py et les scripts d'estimation de distance.
+
+Une source peut être :
+  - un index de caméra (0, 1, ...) ou un périphérique V4L2 (/dev/video0)
+  - un pipeline GStreamer (chaîne contenant '!')
+  - un flux réseau (rtsp://, http://, ...)
+  - un fichier vidéo
+  - un dossier d'images (lues dans l'ordre alphabétique)
+
+Toutes les sources renvoient un VideoSource, utilisable comme un cv2.VideoCapture
+(read, isOpened, get, set, release), qui mémorise en plus l'instant de capture de
+la dernière image pour mesurer la latence capture -> affichage. Seul V4L2 fournit
+l'instant de capture réel ; ailleurs c'est l'instant de lecture, et le temps passé
+dans la file du pilote n'est pas compté.
+"""
+import argparse
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+
+# Backends de capture disponibles en ligne de commande
+BACKENDS = {
+    "auto": cv2.CAP_ANY,
+    "v4l2": cv2.CAP_V4L2,
+    "gstreamer": cv2.CAP_GSTREAMER,
+    "ffmpeg": cv2.CAP_FFMPEG,
+    "dshow": cv2.CAP_DSHOW,
+    "msmf": cv2.CAP_MSMF,
+}
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+STREAM_PREFIXES = ("rtsp://", "rtsps://", "rtmp://", "http://", "https://", "udp://")
+
+
+def parse_source(source):
+    """Convertit '1' en index de caméra, laisse les autres sources telles quelles"""
+    if isinstance(source, str) and source.isdigit():
+        return int(source)
+    return source
+
+
+def gstreamer_pipeline(device="/dev/video0", width=1280, height=720, fps=30, mjpeg=True):
+    """
+    Construit un pipeline GStreamer V4L2 -> appsink sans file d'attente.
+    En MJPEG la caméra compresse les images, ce qui permet des résolutions
+    et des FPS plus élevés sur USB 2.0.
+    """
+    if isinstance(device, int):
+        device = f"/dev/video{device}"
+
+    if mjpeg:
+        caps = f"image/jpeg,width={width},height={height},framerate={fps}/1 ! jpegdec"
+    else:
+        caps = f"video/x-raw,width={width},height={height},framerate={fps}/1"
+
+    # drop=true max-buffers=1 : appsink ne garde que l'image la plus récente
+    return (f"v4l2src device={device} io-mode=2 ! {caps} ! videoconvert ! "
+            f"video/x-raw,format=BGR ! appsink drop=true max-buffers=1 sync=false")
+
+
+class VideoSource:
+    """Enveloppe de cv2.VideoCapture qui horodate chaque image lue"""
+
+    def __init__(self, cap, description):
+        self.cap = cap
+        self.description = description
+        self.timestamp = None
+        # True si timestamp vient de l'horodatage du pilote (instant de capture),
+        # False s'il a été pris au retour de read() (instant de lecture)
+        self.driver_timestamp = False
+
+        # V4L2 fournit l'horodatage noyau de l'image (CLOCK_MONOTONIC, en ms) :
+        # il inclut le temps passé dans les buffers du pilote
+        self._driver_timestamps = cap.getBackendName() == "V4L2" if cap.isOpened() else False
+
+    def read(self):
+        ret, frame = self.cap.read()
+        now = time.perf_counter()
+        self.timestamp = now
+        self.driver_timestamp = False
+
+        if ret and self._driver_timestamps:
+            age = time.monotonic() - self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            # Ignorer les valeurs incohérentes (pilotes sans horodatage monotone)
+            if 0 <= age < 5:
+                self.timestamp = now - age
+                self.driver_timestamp = True
+
+        return ret, frame
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def set(self, prop_id, value):
+        return self.cap.set(prop_id, value)
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirectoryCapture:
+    """Lit les images d'un dossier comme un flux vidéo (interface cv2.VideoCapture)"""
+
+    def __init__(self, folder, loop=False):
+        self.files = sorted(
+            os.path.join(folder, name) for name in os.listdir(folder)
+            if name.lower().endswith(IMAGE_EXTENSIONS))
+        self.loop = loop
+        self.index = 0
+        self.frame_size = (0, 0)
+
+    def read(self):
+        if self.loop and self.files and self.index >= len(self.files):
+            self.index = 0
+        if self.index >= len(self.files):
+            return False, None
+
+        frame = cv2.imread(self.files[self.index])
+        self.index += 1
+        if frame is None:
+            return False, None
+
+        self.frame_size = frame.shape[1], frame.shape[0]
+        return True, frame
+
+    def isOpened(self):
+        return len(self.files) > 0
+
+    def getBackendName(self):
+        return "IMAGES"
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.frame_size[0])
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.frame_size[1])
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.files))
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.index)
+        return 0.0
+
+    def set(self, prop_id, value):
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            self.index = int(value)
+            return True
+        return False
+
+    def release(self):
+        self.files = []
+
+
+class LatestFrameGrabber(VideoSource):
+    """
+    Lit la source en continu dans un thread et ne garde que la dernière image.
+    read() renvoie toujours l'image la plus récente : si le traitement est plus
+    lent que la caméra, les images intermédiaires sont abandonnées au lieu de
+    s'accumuler dans les buffers.
+    """
+
+    def __init__(self, source, timeout=2.0):
+        super().__init__(source.cap, source.description + " +thread")
+        self.source = source
+        self.timeout = timeout
+
+        self._condition = threading.Condition()
+        self._frame = None
+        self._frame_timestamp = None
+        self._frame_driver_timestamp = False
+        self._new_frame = False
+
+        # get()/set() ne doivent pas toucher la capture pendant un cap.read() :
+        # sur V4L2, changer la résolution réalloue les buffers en cours de lecture.
+        # _resume suspend le thread entre deux lectures pour leur laisser le verrou.
+        self._capture_lock = threading.Lock()
+        self._resume = threading.Event()
+        self._resume.set()
+        self._running = source.isOpened()
+
+        self._thread = threading.Thread(target=self._grab_loop, daemon=True)
+        if self._running:
+            self._thread.start()
+
+    def _grab_loop(self):
+        while self._running:
+            self._resume.wait()
+            with self._capture_lock:
+                if not self._running:
+                    break
+                ret, frame = self.source.read()
+                timestamp = self.source.timestamp
+                driver_timestamp = self.source.driver_timestamp
+            with self._condition:
+                if not ret:
+                    self._running = False
+                else:
+                    self._frame = frame
+                    self._frame_timestamp = timestamp
+                    self._frame_driver_timestamp = driver_timestamp
+                    self._new_frame = True
+                self._condition.notify_all()
+
+    def read(self):
+        with self._condition:
+            # Attendre une image qui n'a pas encore été renvoyée
+            self._condition.wait_for(
+                lambda: self._new_frame or not self._running, self.timeout)
+            if not self._new_frame:
+                return False, None
+
+            self._new_frame = False
+            self.timestamp = self._frame_timestamp
+            self.driver_timestamp = self._frame_driver_timestamp
+            return True, self._frame
+
+    def _with_capture(self, action):
+        """Exécute action() sur la capture, le thread de lecture étant suspendu"""
+        self._resume.clear()
+        try:
+            with self._capture_lock:
+                return action()
+        finally:
+            self._resume.set()
+
+    def get(self, prop_id):
+        return self._with_capture(lambda: self.cap.get(prop_id))
+
+    def set(self, prop_id, value):
+        return self._with_capture(lambda: self.cap.set(prop_id, value))
+
+    def release(self):
+        self._running = False
+        self._resume.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.timeout)
+
+        # Ne jamais libérer la capture sous un thread encore bloqué dans cap.read() ;
+        # le thread est un daemon et n'empêche pas le programme de se terminer
+        if self._thread.is_alive():
+            print(f"Attention: la lecture de {self.description} est bloquée, "
+                  "la capture n'est pas libérée")
+            return
+        self.source.release()
+
+
+def open_video_source(source=0, width=None, height=None, fps=None, backend="auto",
+                      fourcc=None, buffer_size=1, threaded=False, loop=False):
+    """
+    Ouvre une source vidéo et applique les réglages de capture.
+
+    buffer_size=1 limite la file d'images du pilote (V4L2, DirectShow) pour
+    éviter que la latence ne s'accumule quand le traitement est plus lent que
+    la caméra. fourcc="MJPG" demande le flux compressé de la caméra.
+    """
+    source = parse_source(source)
+    live = False
+
+    if isinstance(source, str) and os.path.isdir(source):
+        cap = ImageDirectoryCapture(source, loop=loop)
+        description = f"images:{source}"
+    else:
+        # Une caméra ouverte avec le backend GStreamer passe par un pipeline
+        if backend == "gstreamer" and (isinstance(source, int) or str(source).startswith("/dev/")):
+            source = gstreamer_pipeline(source, width or 1280, height or 720, fps or 30,
+                                        mjpeg=(fourcc or "MJPG").upper() == "MJPG")
+        elif isinstance(source, str) and "!" in source:
+            backend = "gstreamer"
+        elif isinstance(source, str) and source.lower().startswith(STREAM_PREFIXES) and backend == "auto":
+            backend = "ffmpeg"
+
+        cap = cv2.VideoCapture(source, BACKENDS[backend])
+        description = f"{source} [{backend}]"
+
+        is_camera = isinstance(source, int) or str(source).startswith("/dev/")
+        # Caméras, pipelines GStreamer et flux réseau produisent des images en continu
+        live = is_camera or backend == "gstreamer" or str(source).lower().startswith(STREAM_PREFIXES)
+        if cap.isOpened() and is_camera:
+            # Le FOURCC doit être réglé avant la résolution avec V4L2
+            if fourcc:
+                cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc.upper()))
+                description += f" {fourcc.upper()}"
+            if width:
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            if height:
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            if fps:
+                cap.set(cv2.CAP_PROP_FPS, fps)
+        if cap.isOpened() and buffer_size:
+            # Ignoré silencieusement par les backends qui ne le gèrent pas
+            if cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size):
+                description += f" buffer={buffer_size}"
+        if loop:
+            print("Option --loop ignorée : réservée aux dossiers d'images")
+
+    video_source = VideoSource(cap, description)
+    if threaded and live:
+        video_source = LatestFrameGrabber(video_source)
+    elif threaded:
+        # Sur un fichier ou un dossier, le thread sauterait la plupart des images
+        print("Option --threaded ignorée : réservée aux caméras et flux en direct")
+    return video_source
+
+
+class LatencyMeter:
+    """
+    Mesure la latence capture -> affichage sur une fenêtre glissante.
+    Sans horodatage du pilote (tout sauf V4L2), seule la latence
+    lecture -> affichage est mesurée : la file du pilote n'est pas comptée.
+    """
+
+    def __init__(self, window=300):
+        self.samples = deque(maxlen=window)
+        self.read_timestamps = 0
+
+    def update(self, video_source):
+        """À appeler juste après cv2.imshow pour l'image lue sur video_source"""
+        if video_source.timestamp is not None:
+            self.samples.append((time.perf_counter() - video_source.timestamp) * 1000)
+            if not video_source.driver_timestamp:
+                self.read_timestamps += 1
+
+    @property
+    def label(self):
+        """Ce qui est réellement mesuré"""
+        if self.read_timestamps:
+            return "latence lecture -> affichage (file du pilote non comprise)"
+        return "latence capture -> affichage"
+
+    def stats(self):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return {
+            'mean': sum(ordered) / len(ordered),
+            'p50': ordered[len(ordered) // 2],
+            'p95': ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)],
+            'max': ordered[-1],
+            'frames': len(ordered),
+        }
+
+    def report(self, description):
+        stats = self.stats()
+        if stats is None:
+            return f"{description}: aucune mesure"
+        return (f"{description}: {self.label} moyenne {stats['mean']:.1f} ms, "
+                f"p50 {stats['p50']:.1f} ms, p95 {stats['p95']:.1f} ms, "
+                f"max {stats['max']:.1f} ms ({stats['frames']} images)")
+
+
+def add_source_arguments(parser):
+    """Ajoute les options de source vidéo communes aux scripts"""
+    group = parser.add_argument_group("source vidéo")
+    group.add_argument("--source", help="Index caméra, /dev/videoN, pipeline GStreamer, URL RTSP, fichier ou dossier d'images")
+    group.add_argument("--width", type=int, help="Largeur demandée à la caméra")
+    group.add_argument("--height", type=int, help="Hauteur demandée à la caméra")
+    group.add_argument("--fps", type=int, help="FPS demandés à la caméra")
+    group.add_argument("--backend", choices=sorted(BACKENDS), help="Backend de capture OpenCV")
+    group.add_argument("--fourcc", help="Format de la caméra, par ex. MJPG")
+    group.add_argument("--buffer-size", type=int, help="Taille du buffer du pilote (1 par défaut, 0 = ne pas régler)")
+    group.add_argument("--threaded", action="store_true", default=None, help="Lire une caméra ou un flux dans un thread (dernière image uniquement)")
+    group.add_argument("--loop", action="store_true", default=None, help="Reboucler un dossier d'images")
+    return parser
+
+
+def source_options_from_args(args):
+    """Renvoie uniquement les options passées en ligne de commande"""
+    names = ("source", "width", "height", "fps", "backend", "fourcc", "buffer_size", "threaded", "loop")
+    return {name: getattr(args, name) for name in names if getattr(args, name, None) is not None}
+
+
+def benchmark(source_options, frames=200, work_ms=0):
+    """
+    Mesure la latence capture -> affichage pour plusieurs configurations.
+    work_ms simule le temps de détection par image : c'est quand le traitement
+    est plus lent que la caméra que les buffers se remplissent. Seul V4L2
+    horodate les images à la capture : ailleurs la file du pilote n'est pas
+    mesurée et les configurations de buffer ne se distinguent pas.
+    """
+    base = dict(source_options)
+    base.pop("buffer_size", None)
+    base.pop("fourcc", None)
+    base.pop("threaded", None)
+
+    configurations = [
+        ("défaut", dict(base, buffer_size=0)),
+        ("buffer=1", dict(base, buffer_size=1)),
+        ("MJPG buffer=1", dict(base, buffer_size=1, fourcc="MJPG")),
+        ("MJPG buffer=1 thread", dict(base, buffer_size=1, fourcc="MJPG", threaded=True)),
+    ]
+
+    results = []
+    read_timestamps = False
+    for name, options in configurations:
+        cap = open_video_source(**options)
+        if not cap.isOpened():
+            print(f"{name}: impossible d'ouvrir la source")
+            continue
+
+        latency = LatencyMeter(window=frames)
+        start = time.perf_counter()
+        count = 0
+        while count < frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if work_ms:
+                time.sleep(work_ms / 1000)
+            cv2.imshow("Benchmark latence", frame)
+            cv2.waitKey(1)
+            latency.update(cap)
+            count += 1
+
+        elapsed = time.perf_counter() - start
+        cap.release()
+
+        report = latency.report(f"{name} ({cap.description})")
+        if count:
+            report += f", {count / elapsed:.1f} FPS"
+        print(report)
+        results.append((name, latency.stats()))
+        read_timestamps = read_timestamps or latency.read_timestamps > 0
+
+    if read_timestamps:
+        print("Attention: pas d'horodatage du pilote (V4L2 uniquement), le temps passé "
+              "dans la file du pilote n'est pas compté : les configurations de buffer "
+              "ne peuvent pas être comparées sur ce backend")
+
+    cv2.destroyAllWindows()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mesure de latence des configurations de capture")
+    add_source_arguments(parser)
+    parser.add_argument("--frames", type=int, default=200, help="Nombre d'images par configuration")
+    parser.add_argument("--work-ms", type=float, default=0, help="Temps de traitement simulé par image (ms)")
+    args = parser.parse_args()
+
+    options = source_options_from_args(args)
+    options.setdefault("source", 0)
+    benchmark(options, frames=args.frames, work_ms=args.work_ms)
@@ -1,8 +1,11 @@
 # Installation: pip install ultralytics opencv-python
+import argparse
 import cv2
 from ultralytics import YOLO
 import math
 
+from video_source import LatencyMeter, add_source_arguments, open_video_source, source_options_from_args
+
 # Distance de la caméra à l'objet (visage) mesurée en centimètres
 Known_distance = 60
 
@@ -185,6 +188,13 @@ def draw_distance_info(image, distance, detection_type, x, y, confidence, person
     cv2.putText(image, conf_text, (int(x), text_bg_y + 25), fonts, 0.4, WHITE, 1)
 
 def main():
+    # Options de la source vidéo (caméra 1 par défaut)
+    parser = argparse.ArgumentParser(description="Estimation de distance avec YOLO")
+    add_source_arguments(parser)
+    args = parser.parse_args()
+    source_options = source_options_from_args(args)
+    source_options.setdefault("source", 1)
+    
     # Lire l'image de référence
     ref_image_path = "captured_images/capture_20250620_155553_000.jpg"
     ref_image = cv2.imread(ref_image_path)
@@ -216,13 +226,16 @@ def main():
     # Afficher l'image de référence
     cv2.imshow("Image de reference", ref_image)
     
-    # Initialiser la caméra
-    cap = cv2.VideoCapture(1)  # Changez en 1 si nécessaire
+    # Initialiser la source vidéo (voir --source)
+    cap = open_video_source(**source_options)
     
     if not cap.isOpened():
-        print("Erreur: Impossible d'ouvrir la caméra")
+        print(f"Erreur: Impossible d'ouvrir la source vidéo {cap.description}")
         return
     
+    # Mesure de la latence capture -> affichage
+    latency = LatencyMeter()
+    
     print("Caméra initialisée. Appuyez sur 'q' pour quitter")
     print("Appuyez sur 'c' pour recalibrer avec l'image actuelle")
     
@@ -266,6 +279,7 @@ def main():
         
         # Afficher la frame
         cv2.imshow("YOLO Distance Estimation", frame)
+        latency.update(cap)
         
         # Gestion des touches
         key = cv2.waitKey(1) & 0xFF
@@ -316,6 +330,7 @@ def main():
             # Afficher les statistiques détaillées pour chaque personne
             print(f"\n=== STATISTIQUES DÉTAILLÉES ===")
             print(f"Distance focale: {Focal_length_found:.6f}")
+            print(latency.report(cap.description))
             print(f"Largeur visage référence: {ref_detections[0]['face_width']:.3f} pixels")
             print(f"Personnes détectées: {len([d for d in detections if d['type'] == 'person'])}")
             print(f"Visages détectés: {len([d for d in detections if d['type'] == 'face'])}")
@@ -331,6 +346,7 @@ def main():
     # Nettoyer
     cap.release()
     cv2.destroyAllWindows()
+    print(latency.report(cap.description))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file